@@ -1,50 +1,122 @@
 import os
+import sys
+import hashlib
+import tempfile
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import json
 import logging
+import random
 import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import concurrent.futures
 import threading
 from queue import Queue
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Optional; stdlib json is used when unavailable
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Constants
 MAX_WORKERS = int(os.getenv('MAX_WORKERS', 5))
+MAX_INFLIGHT = int(os.getenv('MAX_INFLIGHT', MAX_WORKERS * 4))  # uploads awaiting ingest
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', 5))
 RETRY_DELAY = int(os.getenv('RETRY_DELAY', 5))  # seconds
 TOKEN_REFRESH_MARGIN = timedelta(minutes=5)  # Refresh 5 minutes before expiration
 TASK_POLL_INTERVAL = int(os.getenv('TASK_POLL_INTERVAL', 10))  # seconds
 TASK_TIMEOUT = int(os.getenv('TASK_TIMEOUT', 600))  # seconds
-BATCH_SIZE = int(os.getenv('BATCH_SIZE', 100))
 
 # ===========================
 # Utility Functions
 # ===========================
 
+# HTTP statuses worth retrying; other 4xx responses are permanent failures.
+RETRIABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_DELAY_CAP = 60  # seconds
+
+# Exceptions retry_operation treats as transient. Truncated bodies surface as
+# JSON decode errors and resets can bubble up from below urllib3's wrappers.
+TRANSIENT_EXCEPTIONS = (requests.exceptions.RequestException, json.JSONDecodeError, ConnectionResetError)
+if orjson is not None:
+    TRANSIENT_EXCEPTIONS += (orjson.JSONDecodeError,)
+
 def retry_operation(operation, *args, max_retries=MAX_RETRIES, retry_delay=RETRY_DELAY, **kwargs):
     """
     Generic retry wrapper for operations that may fail intermittently.
+
+    Only transient failures (timeouts, connection errors, and retriable HTTP
+    statuses) are retried; other HTTP errors are raised immediately. The delay
+    grows exponentially with jitter and honors a Retry-After header if one
+    was returned.
     """
     for attempt in range(1, max_retries + 1):
         try:
             return operation(*args, **kwargs)
-        except requests.exceptions.RequestException as e:
+        except TRANSIENT_EXCEPTIONS as e:
+            retry_after = None
+            if isinstance(e, requests.exceptions.HTTPError) and e.response is not None:
+                if e.response.status_code not in RETRIABLE_STATUS_CODES:
+                    raise  # Permanent failure; retrying cannot help
+                retry_after = e.response.headers.get('Retry-After')
             logger.error(f"Attempt {attempt} failed: {e}")
             if attempt < max_retries:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
+                delay = min(RETRY_DELAY_CAP, retry_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+                if retry_after is not None:
+                    try:
+                        delay = max(delay, float(retry_after))
+                    except ValueError:
+                        pass
+                logger.info(f"Retrying in {delay:.1f} seconds...")
+                time.sleep(delay)
             else:
                 logger.error(f"Operation failed after {max_retries} attempts.")
                 raise
 
-def chunk_list(lst, chunk_size):
-    """Yield successive chunk_size-sized chunks from lst."""
-    for i in range(0, len(lst), chunk_size):
-        yield lst[i:i + chunk_size]
+def canonical_name(name):
+    """Normalize a correspondent name to its stripped, interned form."""
+    if not name:
+        return None
+    return sys.intern(name.strip())
+
+def json_loads(response):
+    """Decode an HTTP response body, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def format_monetary_value(amount, currency):
+    """Format monetary value as required by Paperless"""
+    if amount is None:
+        return None
+    try:
+        # Round to two decimal places
+        formatted_amount = f"{currency}{amount:.2f}" if currency else f"{amount:.2f}"
+        return formatted_amount
+    except Exception as e:
+        logger.error(f"Error formatting monetary value: {e}")
+        return None
+
+@lru_cache(maxsize=8192)
+def iso_to_date(date_string):
+    """Convert an ISO 8601 timestamp to a date string, caching repeated values."""
+    try:
+        # Python 3.11+ accepts a trailing 'Z' directly, so the common case
+        # needs no intermediate string
+        return datetime.fromisoformat(date_string).date().isoformat()
+    except ValueError:
+        if date_string.endswith('Z'):
+            try:
+                return datetime.fromisoformat(date_string[:-1] + '+00:00').date().isoformat()
+            except ValueError:
+                pass
+        logger.error(f"Invalid ISO date format: {date_string}")
+        return None
 
 # ===========================
 # Shoeboxed Client Class
@@ -55,9 +127,45 @@ class ShoeboxedClient:
         self.client_id, self.client_secret, self.redirect_uri, self.authorization_code = self.check_env_vars()
         self.access_token = None
         self.refresh_token = None
-        self.token_expiry = None  # datetime object
+        self.token_deadline = 0.0  # monotonic time after which a refresh is due
         self.token_lock = threading.RLock()  # Lock for thread-safe token refresh
         self.api_url = 'https://api.shoeboxed.com/v2'
+        # Shared session so concurrent fetches reuse pooled TCP/TLS
+        # connections instead of handshaking per request.
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS * 4))
+        self._cached_headers = None  # Rebuilt whenever the access token changes
+        # Bound total in-flight API requests (workers plus their internal
+        # retries) so bursts cannot trip the Shoeboxed rate limiter.
+        self._request_gate = threading.BoundedSemaphore(MAX_WORKERS * 2)
+
+    def _request(self, method, url, **kwargs):
+        """Issue an API request through the bounded concurrency gate"""
+        with self._request_gate:
+            return self.session.request(method, url, **kwargs)
+
+    def _api_get(self, url):
+        """GET an API URL with retries, refreshing the token once on a 401"""
+        def do_get():
+            response = self._request('GET', url, headers=self.get_headers())
+            if response.status_code == 401:
+                # The token may have expired server-side ahead of our
+                # deadline; refresh once and retry before giving up.
+                logger.warning("Received 401 from Shoeboxed API. Refreshing token and retrying.")
+                self.refresh_access_token()
+                response = self._request('GET', url, headers=self.get_headers())
+            response.raise_for_status()
+            return response
+
+        return retry_operation(do_get)
+
+    def _rebuild_headers(self):
+        """Precompute the request headers for the current access token"""
+        self._cached_headers = {
+            'Authorization': f'Bearer {self.access_token}',
+            'Content-Type': 'application/json',
+            'User-Agent': 'Your Application Name'
+        }
 
     def check_env_vars(self):
         """Check if Shoeboxed environment variables are set"""
@@ -84,9 +192,10 @@ class ShoeboxedClient:
     def authenticate(self):
         """Authenticate with Shoeboxed and obtain tokens"""
         self.access_token, self.refresh_token, expires_in = self.exchange_code_for_access_token()
-        self.token_expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+        self.token_deadline = time.monotonic() + expires_in - TOKEN_REFRESH_MARGIN.total_seconds()
         if not self.access_token or not self.refresh_token:
             raise ValueError("Failed to obtain tokens from Shoeboxed.")
+        self._rebuild_headers()
 
     def exchange_code_for_access_token(self):
         """Exchange authorization code for access and refresh tokens"""
@@ -103,9 +212,9 @@ class ShoeboxedClient:
         }
 
         try:
-            response = requests.post(token_url, headers=headers, auth=(self.client_id, self.client_secret), data=payload)
+            response = self.session.post(token_url, headers=headers, auth=(self.client_id, self.client_secret), data=payload)
             response.raise_for_status()
-            token_data = response.json()
+            token_data = json_loads(response)
             access_token = token_data.get('access_token')
             refresh_token = token_data.get('refresh_token')
             expires_in = token_data.get('expires_in', 1800)  # Default to 30 minutes
@@ -136,13 +245,14 @@ class ShoeboxedClient:
 
             for attempt in range(1, MAX_RETRIES + 1):
                 try:
-                    response = requests.post(token_url, data=payload, headers=headers, timeout=30)
+                    response = self.session.post(token_url, data=payload, headers=headers, timeout=30)
                     response.raise_for_status()
-                    response_data = response.json()
+                    response_data = json_loads(response)
                     self.access_token = response_data.get('access_token')
                     self.refresh_token = response_data.get('refresh_token', self.refresh_token)
                     expires_in = response_data.get('expires_in', 1800)
-                    self.token_expiry = datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+                    self.token_deadline = time.monotonic() + expires_in - TOKEN_REFRESH_MARGIN.total_seconds()
+                    self._rebuild_headers()
                     logger.info("Access token refreshed successfully.")
                     return  # Exit after successful refresh
                 except requests.exceptions.Timeout:
@@ -167,11 +277,19 @@ class ShoeboxedClient:
     def ensure_token_validity(self):
         """Ensure the access token is still valid, refresh if necessary"""
         try:
+            # Fast path without the lock: token_deadline is replaced atomically
+            # on refresh, so a stale read at worst sends us to the slow path.
+            if self.access_token and time.monotonic() < self.token_deadline:
+                return
             with self.token_lock:
-                logger.debug("Entered ensure_token_validity")
-                if not self.access_token or datetime.now(timezone.utc) + TOKEN_REFRESH_MARGIN >= self.token_expiry:
-                    logger.info("Access token is expired or about to expire. Refreshing...")
-                    self.refresh_access_token()
+                # Re-check under the lock: whichever thread got here first has
+                # already refreshed, so the rest return without another
+                # round-trip to the token endpoint.
+                if self.access_token and time.monotonic() < self.token_deadline:
+                    logger.debug("Token already refreshed by another thread.")
+                    return
+                logger.info("Access token is expired or about to expire. Refreshing...")
+                self.refresh_access_token()
         except Exception as e:
             logger.error(f"Error ensuring token validity: {e}", exc_info=True)
             raise
@@ -179,50 +297,84 @@ class ShoeboxedClient:
     def get_headers(self):
         """Get the headers for API requests"""
         self.ensure_token_validity()
-        return {
-            'Authorization': f'Bearer {self.access_token}',
-            'Content-Type': 'application/json',
-            'User-Agent': 'Your Application Name'
-        }
+        return self._cached_headers
 
     def fetch_user_info(self):
         """Fetch user information from Shoeboxed API"""
         url = f"{self.api_url}/user"
-        response = requests.get(url, headers=self.get_headers())
-        response.raise_for_status()
-        user_info = response.json()
+        user_info = json_loads(self._api_get(url))
         account_ids = [account['id'] for account in user_info.get('accounts', [])]
         return account_ids
 
+    def _fetch_documents_page(self, account_id, offset, limit):
+        """Fetch a single page of an account's document list"""
+        url = f"{self.api_url}/accounts/{account_id}/documents?offset={offset}&limit={limit}"
+        return json_loads(self._api_get(url))
+
     def fetch_documents(self, account_id):
         """Fetch all documents for a given account"""
-        all_documents = []
-        base_url = f"{self.api_url}/accounts/{account_id}/documents"
-        offset = 0
         limit = 100
 
-        while True:
-            url = f"{base_url}?offset={offset}&limit={limit}"
-            response = requests.get(url, headers=self.get_headers())
-            response.raise_for_status()
-            data = response.json()
-            documents = data.get('documents', [])
-            if not documents:
-                break
-            all_documents.extend(documents)
-            offset += limit
-            logger.info(f"Fetched {len(all_documents)} documents so far for account {account_id}.")
+        first_page = self._fetch_documents_page(account_id, 0, limit)
+        all_documents = list(first_page.get('documents', []))
+        total = first_page.get('totalCount')
+
+        if total is not None:
+            # The remaining offsets are known from totalCount, so preallocate
+            # the full list and slice-assign each concurrently fetched page
+            # into place instead of growing via extend.
+            first_documents = all_documents
+            all_documents = [None] * total
+            all_documents[0:len(first_documents)] = first_documents
+            filled = len(first_documents)
+
+            offsets = range(limit, total, limit)
+            if offsets:
+                with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    pages = executor.map(
+                        lambda page_offset: self._fetch_documents_page(account_id, page_offset, limit),
+                        offsets
+                    )
+                    for page_offset, page in zip(offsets, pages):
+                        page_documents = page.get('documents', [])
+                        all_documents[page_offset:page_offset + len(page_documents)] = page_documents
+                        filled += len(page_documents)
+
+            if filled != total:
+                # The server returned fewer documents than totalCount
+                # advertised; drop the unfilled slots.
+                all_documents = [document for document in all_documents if document is not None]
+            logger.info(f"Fetched {len(all_documents)} documents for account {account_id}.")
+            return all_documents
+
+        # totalCount missing from the response: fall back to the serial walk,
+        # double-buffered so the next page's fetch overlaps handling of the
+        # current one.
+        offset = limit
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = None
+            if all_documents and len(all_documents) % limit == 0:
+                pending = prefetcher.submit(self._fetch_documents_page, account_id, offset, limit)
+            while pending is not None:
+                documents = pending.result().get('documents', [])
+                pending = None
+                if not documents:
+                    break
+                offset += limit
+                if len(documents) == limit:
+                    pending = prefetcher.submit(self._fetch_documents_page, account_id, offset, limit)
+                all_documents.extend(documents)
+                logger.info(f"Fetched {len(all_documents)} documents so far for account {account_id}.")
 
         return all_documents
 
     def fetch_document(self, account_id, document_id):
         """Fetch a single document's data"""
         url = f"{self.api_url}/accounts/{account_id}/documents/{document_id}"
-        response = requests.get(url, headers=self.get_headers())
-        if response.status_code == 200:
-            return response.json()
-        else:
-            logger.error(f"Failed to fetch document {document_id}. Status Code: {response.status_code}, Response: {response.text}")
+        try:
+            return json_loads(self._api_get(url))
+        except TRANSIENT_EXCEPTIONS as e:
+            logger.error(f"Failed to fetch document {document_id}: {e}")
             return None
 
 # ===========================
@@ -236,10 +388,49 @@ class PaperlessClient:
             'Authorization': f'Token {self.token}',
             'User-Agent': 'Your Application Name'
         }
+        # Shared session with a connection pool so the many small API calls
+        # (upload, poll, update) reuse TCP/TLS connections instead of paying
+        # a fresh handshake per request. Transport-level retries smooth over
+        # transient 5xx responses on idempotent requests without raising, so
+        # callers still see the final status code.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=MAX_WORKERS,
+            pool_maxsize=MAX_WORKERS * 2,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504), raise_on_status=False)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Attachment downloads go to Shoeboxed/S3, not Paperless, so they
+        # use a session without the Authorization header: the Paperless
+        # token must never leave this host, and S3 rejects presigned URLs
+        # when an Authorization header rides along. Same pooled adapter.
+        self._download_session = requests.Session()
+        self._download_session.headers.update({'User-Agent': 'Your Application Name'})
+        self._download_session.mount('https://', adapter)
+        self._download_session.mount('http://', adapter)
+        # Endpoint URLs are built once here; per-request query arguments are
+        # passed via params= so nothing is re-interpolated in hot loops.
+        self._custom_fields_url = f"{self.url}/api/custom_fields/"
+        self._document_types_url = f"{self.url}/api/document_types/"
+        self._correspondents_url = f"{self.url}/api/correspondents/"
+        self._tags_url = f"{self.url}/api/tags/"
+        self._tasks_url = f"{self.url}/api/tasks/"
+        self._post_document_url = f"{self.url}/api/documents/post_document/"
         self.custom_field_mapping = {}
         self.document_type_mapping = {}
         self.correspondent_mapping = {}
         self.tag_mapping = {}
+        # Content hashes of files already uploaded this run, so identical
+        # attachments (e.g. receipts shared between accounts) are not
+        # re-uploaded and re-OCRed by Paperless.
+        self._uploaded_hashes = {}
+        self._hash_lock = threading.Lock()
+        # On-disk cache of downloaded attachments so retried uploads do not
+        # re-download the file from Shoeboxed.
+        self._download_cache_dir = os.path.join(tempfile.gettempdir(), 'soleless-cache')
+        os.makedirs(self._download_cache_dir, exist_ok=True)
 
     def check_env_vars(self):
         """Check if Paperless environment variables are set"""
@@ -251,6 +442,11 @@ class PaperlessClient:
 
         return paperless_token, paperless_url
 
+    def close(self):
+        """Release the pooled HTTP connections"""
+        self.session.close()
+        self._download_session.close()
+
     def ensure_resources(self):
         """Ensure custom fields and document types exist"""
         self.ensure_custom_fields()
@@ -259,12 +455,9 @@ class PaperlessClient:
     def ensure_custom_fields(self):
         """Ensure custom fields exist in Paperless and create mappings"""
         # Fetch existing custom fields
-        response = requests.get(
-            f"{self.url}/api/custom_fields/",
-            headers=self.headers
-        )
+        response = self.session.get(self._custom_fields_url)
         if response.status_code == 200:
-            existing_fields = response.json().get('results', [])
+            existing_fields = json_loads(response).get('results', [])
         else:
             logger.error(f"Failed to fetch custom fields. Status Code: {response.status_code}, Response: {response.text}")
             return []
@@ -301,6 +494,7 @@ class PaperlessClient:
         ]
 
         # Create missing fields
+        created_any = False
         for field in required_fields:
             existing_field = existing_field_names.get(field['name'])
             if not existing_field:
@@ -309,34 +503,40 @@ class PaperlessClient:
                     "data_type": field['data_type'],
                     "extra_data": json.loads(field['extra_data']) if field['extra_data'] != "null" else None
                 }
-                create_response = requests.post(
-                    f"{self.url}/api/custom_fields/",
-                    headers={**self.headers, "Content-Type": "application/json"},
+                create_response = self.session.post(
+                    self._custom_fields_url,
                     json=payload
                 )
                 if create_response.status_code == 201:
+                    created_any = True
                     logger.info(f"Successfully created custom field '{field['name']}'.")
                 else:
                     logger.error(f"Failed to create custom field '{field['name']}'. Status Code: {create_response.status_code}, Response: {create_response.text}")
 
-        # Fetch the updated list of custom fields
-        response = requests.get(
-            f"{self.url}/api/custom_fields/",
-            headers=self.headers
-        )
-        if response.status_code == 200:
-            updated_fields = response.json().get('results', [])
-            self.custom_field_mapping = {field['name']: field for field in updated_fields}
-            logger.info("Custom field mapping created.")
-        else:
-            logger.error(f"Failed to fetch updated custom fields. Status Code: {response.status_code}, Response: {response.text}")
+        # Re-fetch only if something was created; otherwise the first
+        # response already holds the complete list
+        if created_any:
+            response = self.session.get(self._custom_fields_url)
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch updated custom fields. Status Code: {response.status_code}, Response: {response.text}")
+                return
+            existing_fields = json_loads(response).get('results', [])
+
+        for field in existing_fields:
+            # Precompute option -> index lookups for select fields so
+            # map_custom_fields does a single dict lookup per document
+            # instead of two linear scans over the options list.
+            select_options = (field.get('extra_data') or {}).get('select_options') or []
+            field['_opt_index'] = {option: index for index, option in enumerate(select_options)}
+        self.custom_field_mapping = {field['name']: field for field in existing_fields}
+        logger.info("Custom field mapping created.")
 
     def ensure_document_types(self):
         """Ensure document types exist in Paperless and create mappings"""
         # Fetch existing document types
-        response = requests.get(f"{self.url}/api/document_types/", headers=self.headers)
+        response = self.session.get(self._document_types_url)
         if response.status_code == 200:
-            existing_types = response.json().get('results', [])
+            existing_types = json_loads(response).get('results', [])
         else:
             logger.error(f"Failed to fetch document types. Status Code: {response.status_code}, Response: {response.text}")
             return
@@ -351,138 +551,250 @@ class PaperlessClient:
         ]
 
         # Create missing document types
+        created_any = False
         for doc_type in required_types:
             existing_type = existing_type_names.get(doc_type['name'])
             if not existing_type:
-                create_response = requests.post(
-                    f"{self.url}/api/document_types/",
-                    headers={**self.headers, "Content-Type": "application/json"},
+                create_response = self.session.post(
+                    self._document_types_url,
                     json=doc_type
                 )
                 if create_response.status_code == 201:
+                    created_any = True
                     logger.info(f"Successfully created document type '{doc_type['name']}'.")
                 else:
                     logger.error(f"Failed to create document type '{doc_type['name']}'. Status Code: {create_response.status_code}, Response: {create_response.text}")
 
-        # Fetch the updated list of document types
-        response = requests.get(f"{self.url}/api/document_types/", headers=self.headers)
-        if response.status_code == 200:
-            updated_types = response.json().get('results', [])
-            self.document_type_mapping = {doc_type['name']: doc_type['id'] for doc_type in updated_types}
-            logger.info("Document type mapping created.")
-        else:
-            logger.error(f"Failed to fetch updated document types. Status Code: {response.status_code}, Response: {response.text}")
+        # Re-fetch only if something was created; otherwise the first
+        # response already holds the complete list
+        if created_any:
+            response = self.session.get(self._document_types_url)
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch updated document types. Status Code: {response.status_code}, Response: {response.text}")
+                return
+            existing_types = json_loads(response).get('results', [])
+
+        self.document_type_mapping = {doc_type['name']: doc_type['id'] for doc_type in existing_types}
+        logger.info("Document type mapping created.")
 
     def ensure_correspondents(self, correspondents_list):
         """Ensure all correspondents exist in Paperless and create mapping"""
-        # Fetch existing correspondents
-        existing_correspondent_names = self.get_existing_correspondents()
+        names = [name for name in correspondents_list if name]
 
-        # Create missing correspondents
-        for name in correspondents_list:
-            if name and name not in existing_correspondent_names:
-                correspondent_id = self.create_correspondent(name)
-                if correspondent_id:
-                    existing_correspondent_names[name] = correspondent_id
+        # For a small batch, probing each name with a filtered GET beats
+        # crawling the full remote list; past that, the paginated fetch wins
+        if len(names) < 50:
+            found = self._lookup_many(self._correspondents_url, names, "correspondent")
+            existing_correspondent_names = {canonical_name(name): entity_id for name, entity_id in found.items()}
+        else:
+            existing_correspondent_names = self.get_existing_correspondents()
+
+        # Create missing correspondents concurrently; the pooled session is
+        # thread-safe and each create is independent
+        missing_names = [name for name in names if name not in existing_correspondent_names]
+        if missing_names:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(missing_names))) as executor:
+                for name, correspondent_id in zip(missing_names, executor.map(self.create_correspondent, missing_names)):
+                    if correspondent_id:
+                        existing_correspondent_names[name] = correspondent_id
 
         self.correspondent_mapping = existing_correspondent_names
 
+    def _collect_paginated(self, endpoint, params=None, label="results"):
+        """Fetch every page of a paginated endpoint, fanning out after page one.
+
+        The first request reveals the total count and the server's page size,
+        so the remaining pages are known up front and can be fetched
+        concurrently instead of walking the `next` links one at a time.
+        """
+        base_params = dict(params) if params else {}
+        # Ask for the largest page the server allows; the fanout below sizes
+        # itself from what actually comes back, so a lower server cap is fine
+        base_params.setdefault('page_size', 1000)
+        base_params['page'] = 1
+        response = self.session.get(endpoint, params=base_params)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch {label}. Status Code: {response.status_code}, Response: {response.text}")
+            return []
+
+        data = json_loads(response)
+        results = list(data.get('results', []))
+        if not data.get('next') or not results:
+            return results
+
+        count = data.get('count', 0)
+        page_size = len(results)
+        num_pages = (count + page_size - 1) // page_size
+
+        def fetch_page(page):
+            page_params = dict(base_params)
+            page_params['page'] = page
+            page_response = self.session.get(endpoint, params=page_params)
+            if page_response.status_code != 200:
+                logger.error(f"Failed to fetch {label} page {page}. Status Code: {page_response.status_code}, Response: {page_response.text}")
+                return []
+            return json_loads(page_response).get('results', [])
+
+        remaining = range(2, num_pages + 1)
+        if not remaining:
+            # A next link without a usable count leaves nothing to fan out
+            # over; fall back to walking the links one at a time.
+            next_url = data.get('next')
+            while next_url:
+                page_response = self.session.get(next_url)
+                if page_response.status_code != 200:
+                    logger.error(f"Failed to fetch {label}. Status Code: {page_response.status_code}, Response: {page_response.text}")
+                    break
+                page_data = json_loads(page_response)
+                results.extend(page_data.get('results', []))
+                next_url = page_data.get('next')
+            return results
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(remaining))) as executor:
+            for page_results in executor.map(fetch_page, remaining):
+                results.extend(page_results)
+        return results
+
+    def _lookup_id_by_name(self, endpoint, name, label, missing_ok=False):
+        """Resolve a single name to its ID with one filtered request"""
+        response = self.session.get(endpoint, params={"name__iexact": name})
+        if response.status_code != 200:
+            logger.error(f"Failed to look up {label} '{name}'. Status Code: {response.status_code}, Response: {response.text}")
+            return None
+        results = json_loads(response).get('results', [])
+        if not results:
+            if not missing_ok:
+                logger.error(f"{label.capitalize()} '{name}' reported as existing but not found by lookup.")
+            return None
+        return results[0]['id']
+
+    def _lookup_many(self, endpoint, names, label):
+        """Probe a batch of names concurrently, returning the ones that exist"""
+        if not names:
+            return {}
+        found = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(names))) as executor:
+            lookups = executor.map(lambda name: self._lookup_id_by_name(endpoint, name, label, missing_ok=True), names)
+            for name, entity_id in zip(names, lookups):
+                if entity_id:
+                    found[name] = entity_id
+        return found
+
     def get_existing_correspondents(self):
         """Fetch existing correspondents and return a name-to-ID mapping"""
-        existing_correspondent_names = {}
-        page = 1
-        while True:
-            response = requests.get(f"{self.url}/api/correspondents/?page={page}", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('results', [])
-                if not results:
-                    break
-                for correspondent in results:
-                    existing_correspondent_names[correspondent['name']] = correspondent['id']
-                if not data.get('next'):
-                    break
-                page += 1
-            else:
-                logger.error(f"Failed to fetch correspondents. Status Code: {response.status_code}, Response: {response.text}")
-                break
-        return existing_correspondent_names
+        correspondents = self._collect_paginated(self._correspondents_url, label="correspondents")
+        return {canonical_name(correspondent['name']): correspondent['id'] for correspondent in correspondents}
 
     def create_correspondent(self, name):
         """Create a new correspondent and return its ID"""
         payload = {"name": name}
-        create_response = requests.post(
-            f"{self.url}/api/correspondents/",
-            headers={**self.headers, "Content-Type": "application/json"},
+        create_response = self.session.post(
+            self._correspondents_url,
             json=payload
         )
         if create_response.status_code == 201:
-            new_correspondent = create_response.json()
+            new_correspondent = json_loads(create_response)
             logger.info(f"Correspondent '{name}' created successfully.")
             return new_correspondent['id']
         elif create_response.status_code == 400 and "unique constraint" in create_response.text:
-            # Correspondent already exists, fetch its ID
-            existing_correspondents = self.get_existing_correspondents()
-            return existing_correspondents.get(name)
+            # Correspondent already exists; look up just this name instead of
+            # re-walking the whole list
+            correspondent_id = self._lookup_id_by_name(self._correspondents_url, name, "correspondent")
+            if correspondent_id:
+                self.correspondent_mapping[canonical_name(name)] = correspondent_id
+            return correspondent_id
         else:
             logger.error(f"Failed to create correspondent '{name}'. Status Code: {create_response.status_code}, Response: {create_response.text}")
             return None
 
     def ensure_tags(self, tags_list):
         """Ensure all tags exist in Paperless and create mapping"""
-        # Fetch existing tags
-        existing_tag_names = self.get_existing_tags()
+        names = [name for name in tags_list if name]
+
+        # Same small-batch probe as ensure_correspondents
+        if len(names) < 50:
+            existing_tag_names = self._lookup_many(self._tags_url, names, "tag")
+        else:
+            existing_tag_names = self.get_existing_tags()
 
-        # Create missing tags
-        for name in tags_list:
-            if name and name not in existing_tag_names:
-                tag_id = self.create_tag(name)
-                if tag_id:
-                    existing_tag_names[name] = tag_id
+        # Create missing tags concurrently, mirroring ensure_correspondents
+        missing_names = [name for name in names if name not in existing_tag_names]
+        if missing_names:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(missing_names))) as executor:
+                for name, tag_id in zip(missing_names, executor.map(self.create_tag, missing_names)):
+                    if tag_id:
+                        existing_tag_names[name] = tag_id
 
         self.tag_mapping = existing_tag_names
 
     def get_existing_tags(self):
         """Fetch existing tags and return a name-to-ID mapping"""
-        existing_tag_names = {}
-        page = 1
-        while True:
-            response = requests.get(f"{self.url}/api/tags/?page={page}", headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                results = data.get('results', [])
-                if not results:
-                    break
-                for tag in results:
-                    existing_tag_names[tag['name']] = tag['id']
-                if not data.get('next'):
-                    break
-                page += 1
-            else:
-                logger.error(f"Failed to fetch tags. Status Code: {response.status_code}, Response: {response.text}")
-                break
-        return existing_tag_names
+        tags = self._collect_paginated(self._tags_url, label="tags")
+        return {tag['name']: tag['id'] for tag in tags}
 
     def create_tag(self, name):
         """Create a new tag and return its ID"""
         payload = {"name": name}
-        create_response = requests.post(
-            f"{self.url}/api/tags/",
-            headers={**self.headers, "Content-Type": "application/json"},
+        create_response = self.session.post(
+            self._tags_url,
             json=payload
         )
         if create_response.status_code == 201:
-            new_tag = create_response.json()
+            new_tag = json_loads(create_response)
             logger.info(f"Tag '{name}' created successfully.")
             return new_tag['id']
         elif create_response.status_code == 400 and "unique constraint" in create_response.text:
-            # Tag already exists, fetch its ID
-            existing_tags = self.get_existing_tags()
-            return existing_tags.get(name)
+            # Tag already exists; look up just this name instead of re-walking
+            # the whole list
+            tag_id = self._lookup_id_by_name(self._tags_url, name, "tag")
+            if tag_id:
+                self.tag_mapping[name] = tag_id
+            return tag_id
         else:
             logger.error(f"Failed to create tag '{name}'. Status Code: {create_response.status_code}, Response: {create_response.text}")
             return None
 
+    def _download_attachment(self, file_url, document_id):
+        """Stream an attachment into the disk cache, reusing it on retries.
+
+        Returns the cache file path rather than the file bytes so large
+        attachments never have to sit in memory; callers hand the open file
+        straight to the multipart uploader.
+        """
+        cache_path = os.path.join(self._download_cache_dir, str(document_id))
+        if os.path.exists(cache_path):
+            return cache_path, 200
+
+        with self._download_session.get(file_url, stream=True) as file_response:
+            if file_response.status_code != 200:
+                return None, file_response.status_code
+
+            # Write to a partial file first so an interrupted download is
+            # never mistaken for a complete cached copy
+            partial_path = cache_path + '.part'
+            with open(partial_path, 'wb') as cache_file:
+                for chunk in file_response.iter_content(chunk_size=1024 * 1024):
+                    cache_file.write(chunk)
+            os.replace(partial_path, cache_path)
+        return cache_path, 200
+
+    @staticmethod
+    def _hash_file(path):
+        """Compute the sha256 of a file without reading it all at once"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file_obj:
+            for chunk in iter(lambda: file_obj.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _discard_cached_attachment(self, document_id):
+        """Remove a cached attachment once its upload has been accepted."""
+        cache_path = os.path.join(self._download_cache_dir, str(document_id))
+        try:
+            os.remove(cache_path)
+        except OSError:
+            pass
+
     def upload_document(self, document, custom_field_ids, correspondent_id, document_type_id, tag_ids):
         """Upload a document to Paperless"""
         # Extract the necessary data
@@ -495,11 +807,21 @@ class PaperlessClient:
             logger.error(f"Document {document.get('id')} is missing attachment information.")
             return None, None  # Return None for both task_id and status_code
 
-        file_response = requests.get(file_url, headers={'User-Agent': 'Your Application Name'})
-        if file_response.status_code != 200:
-            logger.error(f"Failed to download file for document {document.get('id')}. Status Code: {file_response.status_code}")
-            return None, file_response.status_code
-        file_content = file_response.content
+        file_path, download_status = self._download_attachment(file_url, file_name)
+        if file_path is None:
+            logger.error(f"Failed to download file for document {document.get('id')}. Status Code: {download_status}")
+            return None, download_status
+
+        # Skip the upload entirely when an identical file was already sent
+        # this run. The hash is reserved before uploading so concurrent
+        # workers holding the same bytes do not race each other.
+        content_hash = self._hash_file(file_path)
+        with self._hash_lock:
+            if content_hash in self._uploaded_hashes:
+                logger.warning(f"Document {document.get('id')} has identical content to a previous upload. Skipping the upload; its metadata will not be attached.")
+                self._discard_cached_attachment(file_name)
+                return None, 'duplicate'
+            self._uploaded_hashes[content_hash] = None
 
         # Prepare the upload payload
         # Determine the appropriate 'created' date based on document type
@@ -508,56 +830,84 @@ class PaperlessClient:
         else:
             created_date = document.get('issued')
 
+        if not document_type_id:
+            logger.warning(f"Document type ID not found. Skipping document type association.")
+
+        # Build the multipart body in one expression: the file itself, the
+        # base attributes, then the optional correspondent/type and the
+        # repeated custom_fields/tags entries
+        document_file = open(file_path, 'rb')
         files = [
-            ('document', (file_name, file_content)),
+            ('document', (file_name, document_file)),
             ('title', (None, document.get('title', file_name))),
             ('created', (None, created_date)),
+            *((('correspondent', (None, str(correspondent_id))),) if correspondent_id else ()),
+            *(('custom_fields', (None, str(field_id))) for field_id in custom_field_ids),
+            *((('document_type', (None, str(document_type_id))),) if document_type_id else ()),
+            *(('tags', (None, str(tag_id))) for tag_id in tag_ids),
         ]
 
-        # Include the correspondent if available
-        if correspondent_id:
-            files.append(('correspondent', (None, str(correspondent_id))))
-
-        # Include custom field IDs (without values)
-        for field_id in custom_field_ids:
-            files.append(('custom_fields', (None, str(field_id))))
-
-        # Include document type ID
-        if document_type_id:
-            files.append(('document_type', (None, str(document_type_id))))
-        else:
-            logger.warning(f"Document type ID not found. Skipping document type association.")
-
-        # Include tags
-        for tag_id in tag_ids:
-            files.append(('tags', (None, str(tag_id))))
-
-        # Upload the document to Paperless
-        upload_url = f"{self.url}/api/documents/post_document/"
-        response = requests.post(upload_url, headers=self.headers, files=files)
-        if response.status_code in [200, 202]:
+        # Upload the document to Paperless, streaming the file from disk
+        try:
+            try:
+                response = self.session.post(self._post_document_url, files=files)
+            finally:
+                document_file.close()
             # Handle response based on status code
             if response.status_code == 202:
                 # If response is JSON with task_id
-                task_id = response.json().get('task_id')
+                task_id = json_loads(response).get('task_id')
             elif response.status_code == 200:
                 # If response is a plain UUID string
                 task_id = response.text.strip('"')
+        except Exception:
+            # The request or the response parse raised before any task
+            # owned the reservation; release it, or every later identical
+            # file would be falsely skipped as a duplicate for the rest of
+            # the run.
+            with self._hash_lock:
+                self._uploaded_hashes.pop(content_hash, None)
+            raise
+
+        if response.status_code in [200, 202]:
             logger.info(f"Document {document.get('id')} uploaded successfully. Task ID: {task_id}")
+            with self._hash_lock:
+                self._uploaded_hashes[content_hash] = task_id
+            self._discard_cached_attachment(file_name)
             return task_id, response.status_code  # Return task_id and status_code
         else:
             logger.error(f"Failed to upload document {document.get('id')}. Status Code: {response.status_code}, Response: {response.text}")
+            # Release the hash reservation so a retry can upload the file.
+            with self._hash_lock:
+                self._uploaded_hashes.pop(content_hash, None)
             return None, response.status_code  # Return None and status_code
 
-    def poll_task_completion(self, task_id, timeout=600, interval=10):
-        """Poll for task completion and get document ID or handle failures immediately."""
-        task_url = f"{self.url}/api/tasks/?task_id={task_id}"
+    def forget_upload(self, task_id):
+        """Drop the content-hash reservation held by a failed ingest task.
+
+        Without this, retrying a document whose ingest task failed would hit
+        the dedupe check against its own earlier attempt and be skipped as a
+        duplicate instead of re-uploaded.
+        """
+        with self._hash_lock:
+            for content_hash, owner in list(self._uploaded_hashes.items()):
+                if owner == task_id:
+                    del self._uploaded_hashes[content_hash]
+
+    def poll_task_completion(self, task_id, timeout=600, interval=15):
+        """Poll for task completion and get document ID or handle failures immediately.
+
+        Polling starts at half a second so fast tasks return almost
+        immediately, then backs off with jitter toward the interval cap so
+        many concurrent pollers never hit the server in lockstep.
+        """
         start_time = time.time()
+        delay = 0.5
 
         while time.time() - start_time < timeout:
-            response = requests.get(task_url, headers=self.headers)
+            response = self.session.get(self._tasks_url, params={"task_id": task_id})
             if response.status_code == 200:
-                tasks = response.json()
+                tasks = json_loads(response)
                 if tasks and isinstance(tasks, list) and len(tasks) > 0:
                     task = tasks[0]
                     status = task.get('status')
@@ -580,11 +930,12 @@ class PaperlessClient:
                 else:
                     logger.error(f"Task {task_id} not found in response.")
             elif response.status_code == 404:
-                logger.warning(f"Task {task_id} not found (404). Retrying after {interval} seconds...")
+                logger.warning(f"Task {task_id} not found (404). Retrying after {delay:.1f} seconds...")
             else:
                 logger.error(f"Failed to get task status. Status Code: {response.status_code}, Response: {response.text}")
                 return None
-            time.sleep(interval)
+            time.sleep(delay + random.uniform(0, delay * 0.3))
+            delay = min(delay * 1.5, interval)
 
         logger.error(f"Timeout exceeded while waiting for task {task_id} to complete.")
         return None
@@ -603,7 +954,7 @@ class PaperlessClient:
             payload = {
                 "custom_fields": [{"field": field_id, "value": value} for field_id, value in filtered_custom_field_values.items()]
             }
-            response = requests.patch(update_url, headers={**self.headers, 'Content-Type': 'application/json'}, json=payload)
+            response = self.session.patch(update_url, json=payload)
             if response.status_code in [200, 204]:
                 logger.info(f"Custom fields for document {document_id} updated successfully.")
                 return True
@@ -616,34 +967,43 @@ class PaperlessClient:
             logger.error(f"Failed to update document custom fields for {document_id} after retries: {e}")
             return False
 
-    def fetch_failed_tasks(self):
-        """Fetches all tasks with a FAILURE status from the Paperless API."""
-        failed_tasks = []
+    def iter_failed_tasks(self):
+        """Yield tasks with a FAILURE status as the pages stream in.
+
+        Callers that only need the first match can stop iterating after one
+        page instead of paying for the whole crawl.
+        """
         page = 1
         while True:
-            task_url = f"{self.url}/api/tasks/?status=FAILURE&page={page}"
-            response = requests.get(task_url, headers=self.headers)
-            if response.status_code == 200:
-                data = response.json()
-                tasks = data.get('results', [])
-                if not tasks:
-                    break
-                failed_tasks.extend(tasks)
-                if not data.get('next'):
-                    break
-                page += 1
-            else:
+            response = self.session.get(self._tasks_url, params={"status": "FAILURE", "page": page, "page_size": 1000})
+            if response.status_code != 200:
                 logger.error(f"Failed to fetch tasks. Status Code: {response.status_code}, Response: {response.text}")
-                break
-        return failed_tasks
+                return
+            data = json_loads(response)
+            results = data.get('results', [])
+            yield from results
+            if not results or not data.get('next'):
+                return
+            page += 1
+
+    def fetch_failed_tasks(self):
+        """Fetches all tasks with a FAILURE status from the Paperless API."""
+        return list(self.iter_failed_tasks())
 
     def check_task_status(self, task_id):
         """Check the status of a task without blocking."""
-        task_url = f"{self.url}/api/tasks/?task_id={task_id}"
-        response = requests.get(task_url, headers=self.headers)
+        try:
+            response = self.session.get(self._tasks_url, params={"task_id": task_id})
+        except requests.exceptions.RequestException as e:
+            # A transient network failure must not propagate: the monitor
+            # polls from here, and killing it would strand every uploader
+            # waiting on the slots it holds. Report nothing and let the
+            # caller poll again.
+            logger.error(f"Failed to get task status for {task_id}: {e}")
+            return None, None
         if response.status_code == 200:
             try:
-                data = response.json()
+                data = json_loads(response)
             except ValueError as e:
                 logger.error(f"Failed to parse JSON response for task {task_id}: {e}")
                 logger.error(f"Response content: {response.text}")
@@ -672,36 +1032,195 @@ class PaperlessClient:
             logger.error(f"Failed to get task status for {task_id}. Status Code: {response.status_code}, Response: {response.text}")
             return None, None
 
+    def check_task_statuses(self, task_ids):
+        """Check a batch of tasks with one scalar lookup per task, in parallel.
+
+        The tasks endpoint cannot filter on several task_ids at once, and
+        an unfiltered listing returns every unacknowledged task — a payload
+        that grows with the whole run. Scalar task_id lookups stay O(batch)
+        regardless of how many tasks exist, and the adaptive poll schedule
+        keeps the batch small per tick. Returns a dict of task_id ->
+        (status, related_document); task IDs the server did not report back
+        are omitted so callers can keep waiting on them.
+        """
+        if not task_ids:
+            return {}
+
+        statuses = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(task_ids))) as executor:
+            for task_id, (status, document_id) in zip(task_ids, executor.map(self.check_task_status, task_ids)):
+                if status is not None:
+                    statuses[task_id] = (status, document_id)
+        return statuses
+
+    def poll_tasks_completion(self, task_ids, timeout=600, interval=10):
+        """Poll a batch of tasks until they all finish or the timeout expires.
+
+        Each poll cycle checks every still-pending task concurrently in one
+        batch. Returns a dict of task_id -> document
+        ID on success, 'FAILURE' on failure, or None if the task never
+        completed in time. The poll interval stretches up to 30s while tasks
+        stay pending.
+        """
+        pending = set(task_ids)
+        results = {task_id: None for task_id in task_ids}
+        start_time = time.time()
+
+        while pending and time.time() - start_time < timeout:
+            statuses = self.check_task_statuses(sorted(pending))
+            for task_id, (status, document_id) in statuses.items():
+                if status == 'SUCCESS':
+                    if document_id:
+                        results[task_id] = document_id
+                    else:
+                        logger.error(f"Task {task_id} succeeded but no related_document found.")
+                    pending.discard(task_id)
+                elif status == 'FAILURE':
+                    logger.error(f"Task {task_id} failed.")
+                    results[task_id] = 'FAILURE'
+                    pending.discard(task_id)
+            if not pending:
+                break
+            time.sleep(interval)
+            interval = min(interval * 1.5, 30)
+
+        for task_id in pending:
+            logger.error(f"Timeout exceeded while waiting for task {task_id} to complete.")
+        return results
+
 
 # ===========================
 # Document Processor Class
 # ===========================
 
+# Shoeboxed document type -> Paperless document type name.
+_DOC_TYPE_NAME_MAP = {
+    "business-card": "Business Cards",
+    "other": "Documents",
+    "receipt": "Receipts"
+}
+
+# Extractors for map_custom_fields, keyed by (field name, data type). Each
+# callable pulls the raw value for one Paperless custom field out of a
+# Shoeboxed document; one dict lookup replaces the former if/elif ladder
+# that string-compared every field name per document.
+FIELD_EXTRACTORS = {
+    ('Source Type', 'select'): lambda document: document.get('source', {}).get('type'),
+    ('Issued Date', 'date'): lambda document: iso_to_date(document['issued']) if document.get('issued') else None,
+    ('Uploaded Date', 'date'): lambda document: iso_to_date(document['uploaded']) if document.get('uploaded') else None,
+    ('Notes', 'string'): lambda document: document.get('notes'),  # No truncation for Notes
+    ('Attachment Name', 'string'): lambda document: document.get('attachment', {}).get('name'),
+    ('Shoeboxed Document ID', 'string'): lambda document: document.get('id'),
+    # Receipt specific fields
+    ('Vendor', 'string'): lambda document: document.get('vendor'),
+    ('Invoice Number', 'string'): lambda document: document.get('invoiceNumber'),
+    ('Tax', 'monetary'): lambda document: format_monetary_value(document.get('tax'), document.get('currency')),
+    ('Total', 'monetary'): lambda document: format_monetary_value(document.get('total'), document.get('currency')),
+    ('Currency', 'string'): lambda document: document.get('currency'),
+    ('Payment Type', 'select'): lambda document: document.get('paymentType', {}).get('type'),
+    ('Card Last Four Digits', 'string'): lambda document: (document.get('paymentType') or {}).get('lastFourDigits'),
+    # Business Card specific fields
+    ('First Name', 'string'): lambda document: document.get('firstName'),
+    ('Surname', 'string'): lambda document: document.get('surname'),
+    ('Company', 'string'): lambda document: document.get('company'),
+    ('Email', 'string'): lambda document: document.get('email'),
+    ('Phone', 'string'): lambda document: document.get('phone'),
+    ('City', 'string'): lambda document: document.get('city'),
+    ('State', 'string'): lambda document: document.get('state'),
+    ('Zip', 'string'): lambda document: document.get('zip'),
+    ('Website', 'url'): lambda document: document.get('website'),
+}
+
 class DocumentProcessor:
-    def __init__(self, shoeboxed_client, paperless_client, task_queue):
+    __slots__ = ('shoeboxed_client', 'paperless_client', 'task_queue', 'max_retries', 'inflight_gate', 'task_monitor')
+
+    def __init__(self, shoeboxed_client, paperless_client, task_queue, inflight_gate=None, task_monitor=None):
         self.shoeboxed_client = shoeboxed_client
         self.paperless_client = paperless_client
         self.task_queue = task_queue
         self.max_retries = MAX_RETRIES
+        # Shared with TaskMonitor: a slot is held from upload until the
+        # ingest task leaves monitoring, bounding total in-flight work.
+        self.inflight_gate = inflight_gate
+        # Only the monitor returns slots, so acquires check it is still
+        # alive rather than blocking forever on releases that cannot come.
+        self.task_monitor = task_monitor
+
+    def _acquire_slot(self):
+        """Take an in-flight slot, giving up if the monitor has died.
+
+        Returns whether a slot is actually held. Slots are only ever
+        released by the task monitor; if it crashed, waiting on the gate
+        would block this worker forever, so fall back to running without
+        throttling — the degraded behaviour the script had before the gate.
+        """
+        if self.inflight_gate is None:
+            return False
+        if self.task_monitor is None:
+            self.inflight_gate.acquire()
+            return True
+        while not self.inflight_gate.acquire(timeout=5):
+            if not self.task_monitor.is_alive():
+                logger.warning("Task monitor is not running; continuing without an in-flight slot.")
+                return False
+        return True
 
     def pre_process_metadata(self, all_documents):
         """Pre-process all documents to extract correspondents and tags"""
         correspondents_set = set()
         tags_set = set()
 
+        # Single pass over the documents: dispatch on the document type once
+        # and read the fields needed for both correspondents and tags directly.
         for document in all_documents:
-            # Extract correspondent based on document type
-            correspondent_name = self.get_correspondent_name(document)
+            doc_type = document.get('type', 'other')
+            doc_tags = set()
+            if doc_type == 'receipt':
+                correspondent_name = document.get('vendor')
+                categories = document.get('categories')
+                if categories:
+                    doc_tags.update(categories)
+            elif doc_type == 'business-card':
+                correspondent_name = document.get('company')
+            elif doc_type == 'other':
+                correspondent_name = document.get('name')
+            else:
+                correspondent_name = None
+
+            correspondent_name = canonical_name(correspondent_name)
             if correspondent_name:
                 correspondents_set.add(correspondent_name)
 
-            # Extract tags
-            tags = self.get_tags(document)
-            tags_set.update(tags)
+            # Envelope ID tag for documents sourced via mail
+            source = document.get('source')
+            if source and source.get('type') == 'mail':
+                envelope_id = source.get('envelope')
+                if envelope_id:
+                    doc_tags.add(envelope_id.upper())
+
+            tags_set.update(doc_tags)
+
+            # Cache the derived values on the document so process_document
+            # does not repeat the same extraction on the hot path.
+            document['_corr'] = correspondent_name
+            document['_tags'] = frozenset(doc_tags)
+            document['_dtype'] = self.get_document_type_name(document)
 
         # Ensure correspondents and tags exist in Paperless
-        self.paperless_client.ensure_correspondents(list(correspondents_set))
-        self.paperless_client.ensure_tags(list(tags_set))
+        self.paperless_client.ensure_correspondents(correspondents_set)
+        self.paperless_client.ensure_tags(tags_set)
+
+        # With all mappings ensured, resolve the Paperless IDs once per
+        # document so the concurrent workers skip the lookups entirely.
+        # Custom field values are intentionally not precomputed here: they
+        # must reflect the freshly fetched document in process_document.
+        document_type_mapping = self.paperless_client.document_type_mapping
+        correspondent_mapping = self.paperless_client.correspondent_mapping
+        tag_mapping = self.paperless_client.tag_mapping
+        for document in all_documents:
+            document['_document_type_id'] = document_type_mapping.get(document['_dtype'])
+            document['_correspondent_id'] = correspondent_mapping.get(document['_corr'])
+            document['_tag_ids'] = [tag_mapping[tag] for tag in document['_tags'] if tag in tag_mapping]
 
     def process_document(self, document, attempt=1):
         """Process a single document and add the task to the queue."""
@@ -709,62 +1228,107 @@ class DocumentProcessor:
             account_id = document.get('accountId')
             document_id = document.get('id')
 
-            # Fetch the latest document data
-            latest_document = self.shoeboxed_client.fetch_document(account_id, document_id)
-            if not latest_document:
-                logger.error(f"Failed to fetch latest data for document {document_id}.")
-                return False
+            # The batch list endpoint already returns the full document in
+            # most cases; only pay the per-document round-trip when the
+            # attachment details the upload needs are missing.
+            if not document.get('attachment'):
+                latest_document = self.shoeboxed_client.fetch_document(account_id, document_id)
+                if not latest_document:
+                    logger.error(f"Failed to fetch latest data for document {document_id}.")
+                    return False
+
+                # Carry the metadata cached during pre_process_metadata over to
+                # the freshly fetched copy so it is not recomputed per document.
+                for cached_key in ('_corr', '_tags', '_dtype', '_document_type_id', '_correspondent_id', '_tag_ids'):
+                    if cached_key in document:
+                        latest_document[cached_key] = document[cached_key]
 
-            document = latest_document  # Update the document data with the latest
+                document = latest_document  # Update the document data with the latest
+
+            # Resolve the client once; the mapping lookups below would
+            # otherwise re-walk the attribute chain per access
+            paperless_client = self.paperless_client
 
             # Map custom fields
             custom_field_values = self.map_custom_fields(document)
             custom_field_ids = list(custom_field_values.keys())
 
             # Determine document type
-            document_type_name = self.get_document_type_name(document)
-            document_type_id = self.paperless_client.document_type_mapping.get(document_type_name)
+            if '_document_type_id' in document:
+                document_type_id = document['_document_type_id']
+            else:
+                document_type_name = self.get_document_type_name(document)
+                document_type_id = paperless_client.document_type_mapping.get(document_type_name)
 
             # Get correspondent ID
-            correspondent_name = self.get_correspondent_name(document)
-            correspondent_id = self.paperless_client.correspondent_mapping.get(correspondent_name)
-
-            # Get tag IDs
-            tags = self.get_tags(document)
-            tag_ids = [self.paperless_client.tag_mapping.get(tag) for tag in tags if tag in self.paperless_client.tag_mapping]
-
-            # Upload document
-            task_id, status_code = self.paperless_client.upload_document(
-                document,
-                custom_field_ids,
-                correspondent_id,
-                document_type_id,
-                tag_ids
-            )
-            if not task_id:
-                logger.error(f"Failed to upload document {document_id}.")
-                # Add retry logic here
-                if status_code in [502, 503] and attempt < self.max_retries:
-                    logger.info(f"Retrying upload for document {document_id} due to server error (Attempt {attempt + 1})")
-                    time.sleep(RETRY_DELAY)
-                    return self.process_document(document, attempt=attempt + 1)
-                else:
-                    logger.error(f"Maximum retry attempts reached for document {document_id} or unrecoverable error.")
-                    return False
+            if '_correspondent_id' in document:
+                correspondent_id = document['_correspondent_id']
+            else:
+                correspondent_name = self.get_correspondent_name(document)
+                correspondent_id = paperless_client.correspondent_mapping.get(correspondent_name)
 
-            # Add task to the queue for monitoring
-            task_info = {
-                'task_id': task_id,
-                'document_id': document_id,
-                'custom_field_values': custom_field_values,
-                'attempt': attempt,
-                'document_processor': self,
-                'document': document
-            }
-            self.task_queue.put(task_info)
-            logger.info(f"Task {task_id} for document {document_id} added to the task queue.")
+            # Get tag IDs (single dict lookup per tag)
+            if '_tag_ids' in document:
+                tag_ids = document['_tag_ids']
+            else:
+                tags = self.get_tags(document)
+                tag_mapping = paperless_client.tag_mapping
+                tag_ids = [tag_id for tag_id in (tag_mapping.get(tag) for tag in tags) if tag_id is not None]
+
+            # Hold an in-flight slot from upload until the ingest task leaves
+            # monitoring; TaskMonitor releases it when the task completes,
+            # fails or times out, so uploads stay throttled to what Paperless
+            # is actually consuming.
+            slot_held = self._acquire_slot()
+            try:
+                # Upload document
+                task_id, status_code = paperless_client.upload_document(
+                    document,
+                    custom_field_ids,
+                    correspondent_id,
+                    document_type_id,
+                    tag_ids
+                )
+                if not task_id:
+                    if status_code == 'duplicate':
+                        # The file itself is already in Paperless, but this
+                        # document's custom fields were not attached, so do
+                        # not report it as fully processed.
+                        logger.warning(f"Document {document_id} skipped: identical content was already uploaded; its metadata was not attached.")
+                        return False
+                    logger.error(f"Failed to upload document {document_id}.")
+                    # Add retry logic here
+                    if status_code in [502, 503] and attempt < self.max_retries:
+                        logger.info(f"Retrying upload for document {document_id} due to server error (Attempt {attempt + 1})")
+                        # Give the slot back before retrying so the recursive
+                        # call cannot deadlock waiting on its own slot
+                        if slot_held:
+                            self.inflight_gate.release()
+                            slot_held = False
+                        time.sleep(RETRY_DELAY)
+                        return self.process_document(document, attempt=attempt + 1)
+                    else:
+                        logger.error(f"Maximum retry attempts reached for document {document_id} or unrecoverable error.")
+                        return False
+
+                # Add task to the queue for monitoring; the slot transfers to
+                # the monitor along with the task
+                task_info = {
+                    'task_id': task_id,
+                    'document_id': document_id,
+                    'custom_field_values': custom_field_values,
+                    'attempt': attempt,
+                    'document_processor': self,
+                    'document': document
+                }
+                self.task_queue.put(task_info)
+                slot_held = False
+                logger.info(f"Task {task_id} for document {document_id} added to the task queue.")
 
-            return True
+                return True
+            finally:
+                if slot_held:
+                    self.inflight_gate.release()
         except Exception as e:
             logger.error(f"Error processing document {document_id}: {e}", exc_info=True)
             return False
@@ -778,119 +1342,44 @@ class DocumentProcessor:
 
         # Iterate through available custom fields and set values accordingly
         for field_name, field_info in custom_field_mapping.items():
-            field_id = field_info['id']
             data_type = field_info['data_type']
-            extra_data = field_info.get('extra_data', {})
+            extractor = FIELD_EXTRACTORS.get((field_name, data_type))
+            if extractor is None:
+                continue
 
-            value = None  # Initialize value
+            value = extractor(document)
+            field_id = field_info['id']
 
-            # Implement your field mapping logic here
-            if field_name == 'Source Type' and data_type == 'select':
-                value = document.get('source', {}).get('type')
-                field_options = extra_data.get('select_options', [])
-                if value and value.lower() in field_options:
-                    index = field_options.index(value.lower())
-                    field_mapping[field_id] = index
-                    continue  # Skip further processing for select fields
-            elif field_name == 'Issued Date' and data_type == 'date':
-                issued_date = document.get('issued')
-                if issued_date:
-                    try:
-                        value = datetime.fromisoformat(issued_date.replace("Z", "+00:00")).date().isoformat()
-                    except ValueError:
-                        logger.error(f"Invalid date format for 'issued': {issued_date}")
-            elif field_name == 'Uploaded Date' and data_type == 'date':
-                uploaded_date = document.get('uploaded')
-                if uploaded_date:
-                    try:
-                        value = datetime.fromisoformat(uploaded_date.replace("Z", "+00:00")).date().isoformat()
-                    except ValueError:
-                        logger.error(f"Invalid date format for 'uploaded': {uploaded_date}")
-            elif field_name == 'Notes' and data_type == 'string':
-                value = document.get('notes')  # No truncation for Notes
-            elif field_name == 'Attachment Name' and data_type == 'string':
-                value = document.get('attachment', {}).get('name')
-            elif field_name == 'Shoeboxed Document ID' and data_type == 'string':
-                value = document.get('id')
-            # Receipt specific fields
-            elif field_name == 'Vendor' and data_type == 'string':
-                value = document.get('vendor')
-            elif field_name == 'Invoice Number' and data_type == 'string':
-                value = document.get('invoiceNumber')
-            elif field_name == 'Tax' and data_type == 'monetary':
-                tax_value = document.get('tax')
-                value = self.format_monetary_value(tax_value, document.get('currency'))
-            elif field_name == 'Total' and data_type == 'monetary':
-                total_value = document.get('total')
-                value = self.format_monetary_value(total_value, document.get('currency'))
-            elif field_name == 'Currency' and data_type == 'string':
-                value = document.get('currency')
-            elif field_name == 'Payment Type' and data_type == 'select':
-                value = document.get('paymentType', {}).get('type')
-                field_options = extra_data.get('select_options', [])
-                if value and value.lower() in field_options:
-                    index = field_options.index(value.lower())
+            # Select fields store the option index; an unmatched option falls
+            # through and is stored as its raw string like any other value
+            if data_type == 'select' and value:
+                index = field_info.get('_opt_index', {}).get(value.lower())
+                if index is not None:
                     field_mapping[field_id] = index
                     continue
-            elif field_name == 'Card Last Four Digits' and data_type == 'string':
-                payment_type = document.get('paymentType') or {}
-                value = payment_type.get('lastFourDigits')
-            # Business Card specific fields
-            elif field_name == 'First Name' and data_type == 'string':
-                value = document.get('firstName')
-            elif field_name == 'Surname' and data_type == 'string':
-                value = document.get('surname')
-            elif field_name == 'Company' and data_type == 'string':
-                value = document.get('company')
-            elif field_name == 'Email' and data_type == 'string':
-                value = document.get('email')
-            elif field_name == 'Phone' and data_type == 'string':
-                value = document.get('phone')
-            elif field_name == 'City' and data_type == 'string':
-                value = document.get('city')
-            elif field_name == 'State' and data_type == 'string':
-                value = document.get('state')
-            elif field_name == 'Zip' and data_type == 'string':
-                value = document.get('zip')
-            elif field_name == 'Website' and data_type == 'url':
-                value = document.get('website')
-
-            # Handle string length limits, except for Notes
+
+            # Handle string length limits, except for Notes. A truthy value
+            # can never be the empty string, so only the over-length case
+            # needs checking and the slice only happens when it truncates.
             if value:
-                if field_name != 'Notes' and isinstance(value, str):
-                    if len(value) > 200:
-                        logger.warning(f"Value for field '{field_name}' exceeds 200 characters and will be truncated.")
-                        value = value[:200]  # Truncate to 200 characters
-                    elif len(value) == 0:
-                        value = None  # Set empty strings to None
+                if isinstance(value, str) and len(value) > 200 and field_name != 'Notes':
+                    logger.warning(f"Value for field '{field_name}' exceeds 200 characters and will be truncated.")
+                    value = value[:200]  # Truncate to 200 characters
                 field_mapping[field_id] = value
 
         return field_mapping
 
-    def format_monetary_value(self, amount, currency):
-        """Format monetary value as required by Paperless"""
-        if amount is None:
-            return None
-        try:
-            # Round to two decimal places
-            formatted_amount = f"{currency}{amount:.2f}" if currency else f"{amount:.2f}"
-            return formatted_amount
-        except Exception as e:
-            logger.error(f"Error formatting monetary value: {e}")
-            return None
 
     def get_document_type_name(self, document):
         """Determine the document type name based on Shoeboxed document type"""
-        shoeboxed_doc_type = document.get("type")
-        document_type_name_map = {
-            "business-card": "Business Cards",
-            "other": "Documents",
-            "receipt": "Receipts"
-        }
-        return document_type_name_map.get(shoeboxed_doc_type, "Documents")
+        if '_dtype' in document:
+            return document['_dtype']
+        return _DOC_TYPE_NAME_MAP.get(document.get("type"), "Documents")
 
     def get_correspondent_name(self, document):
         """Extract correspondent name based on document type"""
+        if '_corr' in document:
+            return document['_corr']
         document_type = document.get("type", "other")
 
         if document_type == "receipt":
@@ -902,21 +1391,24 @@ class DocumentProcessor:
         else:
             correspondent_name = None
 
-        if correspondent_name:
-            correspondent_name = correspondent_name.strip()
-        return correspondent_name
+        return canonical_name(correspondent_name)
 
     def get_tags(self, document):
         """Get tags from the document"""
+        if '_tags' in document:
+            return document['_tags']
         tags = set()
 
-        if document.get('type') == 'receipt' and document.get('categories'):
-            categories = document.get('categories', [])
-            tags.update(categories)
+        if document.get('type') == 'receipt':
+            categories = document.get('categories')
+            if categories:
+                tags.update(categories)
 
-        # Check for envelope ID tag for documents sourced via mail
-        if document.get('source', {}).get('type') == 'mail':
-            envelope_id = document.get('source', {}).get('envelope')
+        # Check for envelope ID tag for documents sourced via mail; walk the
+        # source dict once rather than once per field
+        source = document.get('source')
+        if source and source.get('type') == 'mail':
+            envelope_id = source.get('envelope')
             if envelope_id:
                 tags.add(envelope_id.upper())
 
@@ -927,57 +1419,103 @@ class DocumentProcessor:
 # ===========================
 
 class TaskMonitor(threading.Thread):
-    def __init__(self, task_queue, paperless_client):
+    def __init__(self, task_queue, paperless_client, inflight_gate=None):
         super().__init__()
         self.task_queue = task_queue
         self.paperless_client = paperless_client
+        self.inflight_gate = inflight_gate  # Shared with DocumentProcessor
         self.daemon = True  # Allows the thread to exit when the main program exits
         self.running = True
-        self.pending_tasks = {}  # task_id: task_info
+        # Pending tasks split into a hot dict scanned every tick and a cold
+        # one holding the heavy payloads, which are only touched when a task
+        # finishes. The per-tick timeout scan then walks plain floats rather
+        # than dereferencing full task_info dicts.
+        self._start_times = {}  # task_id: time.time() when monitoring began
+        self._task_payloads = {}  # task_id: task_info
+        # Failed-task retries run here rather than on the monitor thread:
+        # a retry blocks re-acquiring the in-flight gate, and the monitor
+        # must stay live to release the slots the other pending tasks hold.
+        self._retry_pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._retry_futures = []
+        # Per-task poll schedule: [next_poll_at, interval, last_status].
+        # The interval doubles while the status stays unchanged and resets
+        # when it moves (e.g. PENDING -> STARTED), so long OCR jobs are
+        # polled rarely while fresh state changes are followed closely.
+        self._poll_state = {}
+        # Set whenever the queue is drained and nothing is pending, so
+        # waiters wake as soon as the last task of a batch resolves.
+        self.all_idle = threading.Event()
+        self.all_idle.set()
 
     def run(self):
         try:
-            while self.running or not self.task_queue.empty() or self.pending_tasks:
+            # Short sleeps while idle (growing up to TASK_POLL_INTERVAL) so newly
+            # queued tasks are picked up promptly without spinning.
+            idle_delay = 0.5
+            while self.running or not self.task_queue.empty() or self._start_times or self._retry_futures:
+                # Drop retries that have finished resubmitting; the new task
+                # they queued is tracked like any other from here on
+                if self._retry_futures:
+                    self._retry_futures = [future for future in self._retry_futures if not future.done()]
+
                 # Process tasks from the queue
                 while not self.task_queue.empty():
                     task_info = self.task_queue.get()
                     task_id = task_info['task_id']
-                    self.pending_tasks[task_id] = {
-                        'task_info': task_info,
-                        'start_time': time.time()
-                    }
+                    self.all_idle.clear()
+                    self._start_times[task_id] = time.time()
+                    self._task_payloads[task_id] = task_info
+                    self._poll_state[task_id] = [0.0, 0.5, None]  # poll immediately
                     logger.info(f"Monitoring started for task {task_id}")
 
-                # Check the status of pending tasks
-                completed_tasks = []
-                for task_id, task_data in list(self.pending_tasks.items()):
-                    task_info = task_data['task_info']
-                    start_time = task_data['start_time']
-
-                    # Check for timeout
-                    if time.time() - start_time > TASK_TIMEOUT:
+                # Time out overdue tasks first so they are not polled again
+                now = time.time()
+                for task_id, start_time in list(self._start_times.items()):
+                    if now - start_time > TASK_TIMEOUT:
+                        task_info = self._task_payloads.pop(task_id)
+                        del self._start_times[task_id]
+                        del self._poll_state[task_id]
+                        self._release_slot()
                         logger.error(f"Task {task_id} for document {task_info['document_id']} timed out.")
-                        completed_tasks.append(task_id)
-                        continue
 
-                    # Poll task status
-                    status, document_id = self.paperless_client.check_task_status(task_id)
+                completed_tasks = []
+
+                # Check the tasks whose poll is due with a single batched
+                # request; the rest keep their schedule untouched
+                due_tasks = [task_id for task_id, state in self._poll_state.items() if now >= state[0]]
+                statuses = self.paperless_client.check_task_statuses(due_tasks) if due_tasks else {}
+                for task_id in due_tasks:
+                    task_info = self._task_payloads[task_id]
+                    status, document_id = statuses.get(task_id, (None, None))
                     if status == 'SUCCESS':
                         logger.info(f"Task {task_id} completed successfully for document {task_info['document_id']}.")
+                        self._release_slot()
                         # Update custom fields
                         self.paperless_client.update_custom_fields(document_id, task_info['custom_field_values'])
                         completed_tasks.append(task_id)
                     elif status == 'FAILURE':
                         logger.error(f"Task {task_id} failed for document {task_info['document_id']}.")
+                        # Release the slot before any retry so the re-upload
+                        # cannot deadlock waiting on the slot this task holds
+                        self._release_slot()
+                        # Forget the content hash recorded for this upload so
+                        # the retry is not skipped as a duplicate of itself
+                        self.paperless_client.forget_upload(task_id)
                         # Handle retries if applicable
                         attempt = task_info['attempt']
                         if attempt < MAX_RETRIES:
                             logger.info(f"Retrying document {task_info['document_id']} (Attempt {attempt + 1})")
-                            # Re-upload the document and re-add to the queue
+                            # Resubmit on a worker, never this thread: the
+                            # retry blocks acquiring an in-flight slot, and
+                            # if another uploader grabs the one just freed,
+                            # a synchronous call would wedge the only thread
+                            # that releases the remaining slots
                             document_processor = task_info.get('document_processor')
                             document = task_info.get('document')
                             if document_processor and document:
-                                document_processor.process_document(document, attempt=attempt + 1)
+                                self._retry_futures.append(
+                                    self._retry_pool.submit(document_processor.process_document, document, attempt=attempt + 1)
+                                )
                             else:
                                 logger.error(f"Cannot retry document {task_info['document_id']} due to missing information.")
                         else:
@@ -985,19 +1523,61 @@ class TaskMonitor(threading.Thread):
                         completed_tasks.append(task_id)
                     else:
                         logger.debug(f"Task {task_id} status: {status}")
+                        # Back off while the status holds, reset when it
+                        # moves, and jitter +/-20% so pollers spread out
+                        state = self._poll_state[task_id]
+                        state[1] = 0.5 if status != state[2] else min(state[1] * 2, 30)
+                        state[2] = status
+                        state[0] = time.time() + state[1] * random.uniform(0.8, 1.2)
 
                 # Remove completed tasks
                 for task_id in completed_tasks:
-                    del self.pending_tasks[task_id]
-
-                time.sleep(TASK_POLL_INTERVAL)
+                    del self._start_times[task_id]
+                    del self._task_payloads[task_id]
+                    del self._poll_state[task_id]
+
+                if self._start_times:
+                    idle_delay = 0.5
+                    # Sleep only until the next scheduled poll, capped at the
+                    # configured interval so queue pickups stay responsive
+                    next_due = min(state[0] for state in self._poll_state.values())
+                    time.sleep(min(max(next_due - time.time(), 0.1), TASK_POLL_INTERVAL))
+                else:
+                    if self.task_queue.empty() and not self._retry_futures:
+                        self.all_idle.set()
+                    time.sleep(idle_delay)
+                    idle_delay = min(idle_delay * 2, TASK_POLL_INTERVAL)
         except Exception as e:
             logger.error(f"Exception in TaskMonitor: {e}", exc_info=True)
             self.running = False
+            # Give back every slot this thread still holds so uploaders
+            # blocked on the gate wake now instead of via their liveness
+            # check; with the monitor dead, nothing else would release them
+            for _ in range(len(self._start_times)):
+                self._release_slot()
+            self.all_idle.set()  # Never leave waiters blocked after a crash
+        finally:
+            self._retry_pool.shutdown(wait=False)
+
+    def _release_slot(self):
+        """Return an in-flight slot to the uploaders, if a gate is wired up"""
+        if self.inflight_gate is not None:
+            self.inflight_gate.release()
 
     def stop(self):
         self.running = False
 
+    def wait_until_idle(self):
+        """Block until the queue is drained and no tasks remain pending.
+
+        Wakes as soon as the monitor reports idle instead of sleeping a full
+        poll interval past the last completion; the loop re-checks the state
+        so a task enqueued between checks is never missed.
+        """
+        while self.is_alive() and (not self.task_queue.empty() or self._start_times or self._retry_futures):
+            self.all_idle.clear()
+            self.all_idle.wait(timeout=TASK_POLL_INTERVAL)
+
 
 # ===========================
 # Main Function
@@ -1030,58 +1610,63 @@ def main():
 
     # Step 3: Prepare task queue and start task monitor
     task_queue = Queue()
-    task_monitor = TaskMonitor(task_queue, paperless_client)
+    # Bounds uploads that are still being ingested; slots are taken by
+    # process_document and returned by the monitor as tasks resolve.
+    inflight_gate = threading.Semaphore(MAX_INFLIGHT)
+    task_monitor = TaskMonitor(task_queue, paperless_client, inflight_gate)
     task_monitor.start()
 
     # Step 4: Process documents
-    document_processor = DocumentProcessor(shoeboxed_client, paperless_client, task_queue)
+    document_processor = DocumentProcessor(shoeboxed_client, paperless_client, task_queue, inflight_gate, task_monitor)
 
     all_documents = []
 
-    for account_id in account_ids:
-        try:
-            documents = shoeboxed_client.fetch_documents(account_id)
-            all_documents.extend(documents)
-        except Exception as e:
-            logger.error(f"Failed to fetch documents for account {account_id}: {e}")
-            continue
+    # Fetch each account's documents concurrently; the calls are independent
+    # and purely network-bound.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(16, max(1, len(account_ids)))) as executor:
+        future_to_account = {
+            executor.submit(shoeboxed_client.fetch_documents, account_id): account_id
+            for account_id in account_ids
+        }
+        for future in concurrent.futures.as_completed(future_to_account):
+            account_id = future_to_account[future]
+            try:
+                all_documents.extend(future.result())
+            except Exception as e:
+                logger.error(f"Failed to fetch documents for account {account_id}: {e}")
 
     # Pre-process metadata for all documents before batch processing
     document_processor.pre_process_metadata(all_documents)
 
-    # Split documents into batches
-    batches = list(chunk_list(all_documents, BATCH_SIZE))
-
-    total_batches = len(batches)
-    for batch_index, batch in enumerate(batches, start=1):
-        logger.info(f"Processing batch {batch_index} of {total_batches} with {len(batch)} documents.")
-
-        # Process documents in the batch concurrently
-        with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            futures = [executor.submit(document_processor.process_document, document) for document in batch]
-
-            # Wait for all document processing tasks in the batch to complete
-            for future in concurrent.futures.as_completed(futures):
-                try:
-                    result = future.result()
-                    if result:
-                        logger.info("Document processed successfully.")
-                    else:
-                        logger.error("Document failed to process.")
-                except Exception as exc:
-                    logger.error(f"Document processing generated an exception: {exc}")
+    # Submit every document to the shared pool up front. The pool bounds
+    # upload concurrency, and the task monitor drains ingest tasks in the
+    # background, so late uploads overlap the OCR tail of earlier ones
+    # instead of stalling at batch boundaries.
+    total_documents = len(all_documents)
+    logger.info(f"Processing {total_documents} documents.")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(document_processor.process_document, document) for document in all_documents]
 
-        # Wait for all tasks in the queue to be processed before moving to the next batch
-        while not task_queue.empty() or task_monitor.pending_tasks:
-            logger.info(f"Waiting for all tasks in batch {batch_index} to complete...")
-            time.sleep(TASK_POLL_INTERVAL)
+        for completed, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+            try:
+                result = future.result()
+                if result:
+                    logger.info(f"Document processed successfully ({completed}/{total_documents}).")
+                else:
+                    logger.error(f"Document failed to process ({completed}/{total_documents}).")
+            except Exception as exc:
+                logger.error(f"Document processing generated an exception: {exc}")
 
-        logger.info(f"Batch {batch_index} processing completed.")
+    # All uploads are in; wait once for the monitor to finish the tail
+    logger.info("Waiting for remaining ingest tasks to complete...")
+    task_monitor.wait_until_idle()
 
     # Stop the task monitor after all batches are processed
     task_monitor.stop()
     task_monitor.join()
 
+    paperless_client.close()
+
     logger.info("Document migration completed successfully.")
 
 if __name__ == "__main__":